@@ -0,0 +1,128 @@
+"""Command line entry point. Run with python -m Sudoku solve [files]
+
+Puzzles are read one per line as 81 chars in row order, with '.', '0' or ' '
+for blank cells. Blank lines and lines starting with '#' are skipped. Results
+are written to stdout in input order as they complete.
+
+With more than one worker each puzzle is sent to the pool as soon as it is read,
+so results stream out even when the input trickles in. For bulk runs where that
+latency does not matter, --batch-size gathers puzzles into blocks that are
+solved through the shared memory batch mode instead of pickling each one.
+"""
+from typing import Iterable, Iterator, TextIO
+from collections import deque
+from functools import partial
+from itertools import islice
+import argparse
+import json
+import os
+import sys
+import time
+
+from .batch import solveFlat, solveBatch, batchPool, STATUS_NAMES, SOLVED
+
+FORMAT_81 = "81"
+FORMAT_JSON = "json"
+
+def readPuzzles(files: list[TextIO]) -> Iterator[str]:
+    for f in files:
+        yield from readLines(f)
+        if f is not sys.stdin:
+            f.close()
+
+def readLines(f: TextIO) -> Iterator[str]:
+    for line in f:
+        line = line.rstrip("\r\n")
+        if len(line.strip()) == 0 or line.startswith("#"):
+            continue
+        yield line
+
+def solveAll(puzzles: Iterable[str], workers: int, timeBudget: float, batchSize: int = 1) -> Iterator[tuple[str, int, str]]:
+    solver = partial(solveFlat, timeBudget=timeBudget)
+    if workers <= 1:
+        for puzzle in puzzles:
+            yield (puzzle, *solver(puzzle))
+        return
+    with batchPool(workers) as pool:
+        if batchSize > 1:
+            it = iter(puzzles)
+            while True:
+                block = list(islice(it, batchSize))
+                if len(block) == 0:
+                    return
+                (boards, statuses) = solveBatch(block, workers, timeBudget, pool)
+                yield from zip(block, statuses, boards)
+        # Keep the puzzles so they can be reported alongside their results. imap
+        # reads the input from another thread so use a deque which is thread safe
+        pending = deque()
+        def tracked():
+            for puzzle in puzzles:
+                pending.append(puzzle)
+                yield puzzle
+        # One puzzle per task so each result is written as soon as it is ready
+        for result in pool.imap(solver, tracked(), chunksize=1):
+            yield (pending.popleft(), *result)
+
+def formatResult(format: str, puzzle: str, status: int, board: str) -> str:
+    if format == FORMAT_JSON:
+        return json.dumps({
+            "puzzle": puzzle,
+            "status": STATUS_NAMES[status],
+            "solution": board if status == SOLVED else None,
+        })
+    if status == SOLVED:
+        return board
+    return STATUS_NAMES[status]
+
+def solveCommand(args: argparse.Namespace) -> int:
+    counts = {name: 0 for name in STATUS_NAMES.values()}
+    start = time.perf_counter()
+    out = sys.stdout
+    for (puzzle, status, board) in solveAll(readPuzzles(args.inputs), args.workers, args.time_budget, args.batch_size):
+        counts[STATUS_NAMES[status]] += 1
+        out.write(formatResult(args.format, puzzle, status, board))
+        out.write("\n")
+        if args.flush:
+            out.flush()
+    elapsed = time.perf_counter() - start
+    if args.stats:
+        total = sum(counts.values())
+        rate = total / elapsed if elapsed > 0 else 0
+        summary = ", ".join("{} {}".format(n, name) for (name, n) in counts.items() if n > 0)
+        print("{} puzzles in {:.3f}s ({:.1f}/s): {}".format(total, elapsed, rate, summary or "none"), file=sys.stderr)
+    return 0 if counts[STATUS_NAMES[SOLVED]] == sum(counts.values()) else 1
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m Sudoku")
+    commands = parser.add_subparsers(dest="command", required=True)
+    solve = commands.add_parser("solve", help="solve puzzles read one per line")
+    solve.add_argument("files", nargs="*", default=["-"], help="files to read, '-' or none for stdin")
+    solve.add_argument("-w", "--workers", type=int, default=1, help="number of worker processes")
+    solve.add_argument("-b", "--batch-size", type=int, default=1, help="with several workers, solve blocks of this many puzzles through shared memory")
+    solve.add_argument("-t", "--time-budget", type=float, default=None, help="seconds allowed per puzzle")
+    solve.add_argument("-f", "--format", choices=[FORMAT_81, FORMAT_JSON], default=FORMAT_81, help="output format")
+    solve.add_argument("-s", "--stats", action="store_true", help="print a throughput summary to stderr")
+    solve.add_argument("--flush", action="store_true", help="flush output after every puzzle")
+    solve.set_defaults(func=solveCommand)
+    args = parser.parse_args(argv)
+    if args.command == "solve":
+        args.inputs = []
+        for name in args.files:
+            if name == "-":
+                args.inputs.append(sys.stdin)
+                continue
+            try:
+                args.inputs.append(open(name))
+            except OSError as e:
+                solve.error("cannot read {}: {}".format(name, e.strerror))
+    try:
+        return args.func(args)
+    except BrokenPipeError:
+        # The reader went away, e.g. piped into head. Stop quietly and make sure
+        # flushing stdout at exit does not complain again
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
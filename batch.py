@@ -0,0 +1,150 @@
+"""Solve many puzzles in parallel without copying boards between processes.
+
+The puzzles are packed into a single shared memory block as 81 byte records
+(see sudoku.loadFlat) followed by one status byte per puzzle. Each worker
+solves a range of records in place, overwriting the puzzle with its solution,
+and writes the status code for each one. Nothing but the block name and index
+range is sent to the workers.
+"""
+from multiprocessing import Pool, resource_tracker
+from multiprocessing.pool import Pool as PoolType
+from multiprocessing.shared_memory import SharedMemory
+import os
+import time
+
+from .sudoku import sudoku, PuzzleSolved, BadPuzzleState, TimeBudgetExceeded, InvalidPuzzle
+
+RECORD_SIZE = 81
+
+# Written in place of a puzzle that cannot be packed into a record
+PLACEHOLDER = b"?" * RECORD_SIZE
+
+# Status codes
+PENDING = 0
+SOLVED = 1
+STUCK = 2
+BAD_PUZZLE = 3
+INVALID = 4
+TIMEOUT = 5
+
+STATUS_NAMES = {
+    PENDING: "pending",
+    SOLVED: "solved",
+    STUCK: "stuck",
+    BAD_PUZZLE: "bad_puzzle",
+    INVALID: "invalid",
+    TIMEOUT: "timeout",
+}
+
+def packPuzzles(puzzles: list[str]) -> SharedMemory:
+    count = len(puzzles)
+    shm = SharedMemory(create=True, size=max(1, count * (RECORD_SIZE + 1)))
+    shm.buf[count * RECORD_SIZE:count * (RECORD_SIZE + 1)] = bytes(count)
+    for i, puzzle in enumerate(puzzles):
+        if len(puzzle) != RECORD_SIZE or not puzzle.isascii():
+            # Mark this one invalid up front so one bad line does not sink the batch
+            shm.buf[i * RECORD_SIZE:(i + 1) * RECORD_SIZE] = PLACEHOLDER
+            shm.buf[count * RECORD_SIZE + i] = INVALID
+            continue
+        shm.buf[i * RECORD_SIZE:(i + 1) * RECORD_SIZE] = puzzle.encode("ascii")
+    return shm
+
+def solveFlat(puzzle: str, timeBudget: float = None) -> tuple[int, str]:
+    """Solve a flat puzzle. Returns a status code and the solution, or the puzzle
+    unchanged if it was not solved"""
+    su = sudoku()
+    try:
+        su.loadFlat(puzzle)
+    except InvalidPuzzle:
+        return BAD_PUZZLE, puzzle
+    except Exception:
+        return INVALID, puzzle
+    if timeBudget is not None:
+        su.deadline = time.perf_counter() + timeBudget
+    try:
+        su.solve()
+    except PuzzleSolved:
+        pass
+    except BadPuzzleState:
+        return BAD_PUZZLE, puzzle
+    except TimeBudgetExceeded:
+        return TIMEOUT, puzzle
+    if not su.solved():
+        return STUCK, puzzle
+    return SOLVED, su.flatValue()
+
+def solveRecord(buf: memoryview, index: int, timeBudget: float = None) -> int:
+    start = index * RECORD_SIZE
+    puzzle = bytes(buf[start:start + RECORD_SIZE]).decode("ascii")
+    (status, board) = solveFlat(puzzle, timeBudget)
+    if status == SOLVED:
+        buf[start:start + RECORD_SIZE] = board.encode("ascii")
+    return status
+
+def solveRecords(buf: memoryview, count: int, start: int, stop: int, timeBudget: float = None) -> int:
+    """Solve records start to stop in a block of count records. Returns the number solved"""
+    solved = 0
+    for i in range(start, stop):
+        if buf[count * RECORD_SIZE + i] != PENDING:
+            # Rejected when packed
+            continue
+        status = solveRecord(buf, i, timeBudget)
+        buf[count * RECORD_SIZE + i] = status
+        if status == SOLVED:
+            solved += 1
+    return solved
+
+def solveRange(name: str, count: int, start: int, stop: int, timeBudget: float = None) -> int:
+    """Worker side of solveRecords(), attaching to the block by name"""
+    shm = SharedMemory(name=name)
+    try:
+        buf = shm.buf
+        solved = solveRecords(buf, count, start, stop, timeBudget)
+        del buf
+        return solved
+    finally:
+        shm.close()
+
+def ranges(count: int, workers: int) -> list[tuple[int, int]]:
+    size = -(-count // workers)
+    return [(i, min(i + size, count)) for i in range(0, count, size)]
+
+def batchPool(workers: int) -> PoolType:
+    """A pool for reuse across solveBatch() calls. The resource tracker is started first
+    so the workers share it with this process. Otherwise each worker starts its own,
+    which reports the blocks it attached to as leaked when it exits"""
+    resource_tracker.ensure_running()
+    return Pool(workers)
+
+def solveBatch(puzzles: list[str], workers: int = None, timeBudget: float = None, pool: PoolType = None) -> tuple[list[str], list[int]]:
+    """Solve a list of flat puzzles. Returns the boards (solved in place where
+    possible) and a status code for each puzzle. Pass a pool from batchPool(), with
+    workers set to its size, to reuse its processes across batches"""
+    count = len(puzzles)
+    if count == 0:
+        return [], []
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, count))
+    shm = packPuzzles(puzzles)
+    try:
+        # Several ranges per worker so that a few slow puzzles do not hold up the batch
+        jobs = [(shm.name, count, start, stop, timeBudget) for (start, stop) in ranges(count, workers * 4)]
+        if pool is not None:
+            pool.starmap(solveRange, jobs)
+        elif workers == 1:
+            buf = shm.buf
+            solveRecords(buf, count, 0, count, timeBudget)
+            del buf
+        else:
+            with Pool(workers) as pool:
+                pool.starmap(solveRange, jobs)
+        buf = shm.buf
+        statuses = list(buf[count * RECORD_SIZE:count * (RECORD_SIZE + 1)])
+        boards = [puzzles[i] if statuses[i] == INVALID else bytes(buf[i * RECORD_SIZE:(i + 1) * RECORD_SIZE]).decode("ascii")
+                  for i in range(count)]
+        del buf
+        return boards, statuses
+    finally:
+        shm.close()
+        shm.unlink()
@@ -0,0 +1,115 @@
+"""Simple benchmarks for the solver. Run with python -m Sudoku.benchmark"""
+import gc
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from . import data
+from .sudoku import sudoku, PuzzleSolved, ROW_MAJOR, MRV
+
+puzzles = {
+    "hard_puzzle": data.hard_puzzle,
+    "harder_puzzle": data.harder_puzzle,
+    "hardest_puzzle": data.hardest_puzzle,
+}
+
+# Import time budget for the solver core, used by short lived CLI and worker processes
+IMPORT_BUDGET_MS = 50
+
+IMPORT_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import Sudoku.sudoku
+elapsed = time.perf_counter() - start
+print(elapsed * 1000, "curses" in sys.modules)
+"""
+
+def importTime() -> tuple[float, bool]:
+    """Time importing the solver core in a fresh interpreter. Returns the time in ms
+    and whether curses was loaded"""
+    packageParent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=packageParent)
+    output = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT], env=env, capture_output=True, text=True, check=True).stdout
+    (ms, cursesLoaded) = output.split()
+    return float(ms), cursesLoaded == "True"
+
+def benchImportTime(repeat: int = 5):
+    print("Import time of Sudoku.sudoku")
+    results = [importTime() for _ in range(repeat)]
+    best = min(ms for (ms, _) in results)
+    status = "ok" if best <= IMPORT_BUDGET_MS else "OVER BUDGET"
+    print("  best of {}: {:.2f}ms (budget {}ms) {}".format(repeat, best, IMPORT_BUDGET_MS, status))
+    if any(cursesLoaded for (_, cursesLoaded) in results):
+        print("  curses was imported")
+
+def solvePuzzle(puzzle: str, trialOrder: str = ROW_MAJOR) -> sudoku:
+    su = sudoku(trialOrder)
+    su.load(puzzle)
+    try:
+        su.solve()
+    except PuzzleSolved:
+        pass
+    return su
+
+def benchTrialOrder():
+    print("Trials per solve by trial order")
+    for name, puzzle in puzzles.items():
+        for order in (ROW_MAJOR, MRV):
+            start = time.perf_counter()
+            su = solvePuzzle(puzzle, order)
+            elapsed = time.perf_counter() - start
+            status = "solved" if su.solved() else "stuck"
+            print("  {:<15} {:<9} trials={:<4} {:.1f}ms {}".format(name, order, su.trials, elapsed * 1000, status))
+
+def bytesPerBoard(build, count: int = 100) -> float:
+    build()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        boards = [build() for _ in range(count)]
+        (current, _) = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del boards
+    return current / count
+
+# Bytes per board for hardest_puzzle measured the same way with the model as it was
+# before __slots__, when every Cell and CellGroup carried a __dict__ and its own cell list
+MEMORY_BASELINE = {"loaded": 24500, "potentials set": 26300, "solved": 24850}
+MEMORY_TARGET_RATIO = 5
+
+def benchMemory() -> bool:
+    """Returns False if any board state misses MEMORY_TARGET_RATIO"""
+    print("Memory per board (tracemalloc)")
+    def loaded():
+        su = sudoku()
+        su.load(data.hardest_puzzle)
+        return su
+    def withPotentials():
+        su = loaded()
+        su.initPotentials()
+        return su
+    def solved():
+        return solvePuzzle(data.hardest_puzzle)
+    ok = True
+    for (name, build) in (("loaded", loaded), ("potentials set", withPotentials), ("solved", solved)):
+        size = bytesPerBoard(build)
+        ratio = MEMORY_BASELINE[name] / size
+        status = "ok" if ratio >= MEMORY_TARGET_RATIO else "BELOW {}x TARGET".format(MEMORY_TARGET_RATIO)
+        print("  {:<15} {:.0f} bytes, {:.1f}x smaller than baseline {} bytes, {}".format(name, size, ratio, MEMORY_BASELINE[name], status))
+        ok = ok and ratio >= MEMORY_TARGET_RATIO
+    return ok
+
+def main() -> int:
+    benchImportTime()
+    memoryOk = benchMemory()
+    benchTrialOrder()
+    if not memoryOk:
+        print("Memory per board is below the {}x target".format(MEMORY_TARGET_RATIO), file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
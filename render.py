@@ -0,0 +1,147 @@
+"""Curses rendering for a sudoku. All the per cell drawing state lives here so the
+model classes in sudoku.py only carry what the solver needs.
+
+Run the interactive solver with python -m Sudoku.render
+"""
+from typing import TYPE_CHECKING
+import curses
+import logging
+import time
+
+from .sudoku import sudoku, Cell, PuzzleSolved, COLOR_PAIR, listify
+
+if TYPE_CHECKING:
+    from curses import _CursesWindow
+
+class CursesView:
+
+    def __init__(self, window: '_CursesWindow') -> None:
+        self.window = window
+        self.drawPos: dict[Cell, tuple[int, int]] = {}
+        self.drawAttr: dict[Cell, int] = {}
+        # Cells that were incomplete when the current preview started
+        self.previewCells: list[Cell] = []
+
+    def attr(self, cell: Cell) -> int:
+        return self.drawAttr.get(cell, 0)
+
+    def markGiven(self, cell: Cell):
+        self.drawAttr[cell] = curses.A_BOLD
+
+    def draw(self, su: 'sudoku'):
+        window = self.window
+        window.clear()
+        curses.curs_set(False)
+        curses.init_pair(1, curses.COLOR_RED, curses.COLOR_BLACK)
+        curses.init_pair(2, curses.COLOR_CYAN, curses.COLOR_BLACK)
+        curses.init_pair(3, curses.COLOR_YELLOW, curses.COLOR_BLACK)
+        for i in range(1,4):
+            COLOR_PAIR[i] = curses.color_pair(i)
+        width = (3 + 4) * 3 + 4
+        gap = int((curses.COLS - width) / 2)
+        dashRow = "-" * width
+        start = 2
+        y = start
+        nRow = 0
+        for row in su.cells:
+            if nRow % 3 == 0:
+                window.addstr(y, gap, dashRow)
+                y += 1
+            for j in range(4):
+                window.addch(y, gap + j*8, "|")
+            offset = gap + 2
+            n = 0
+            for cell in row:
+                if cell.complete():
+                    window.addstr(y, offset, str(cell.value), self.attr(cell))
+                self.drawPos[cell] = (y, offset)
+                offset += 2
+                n += 1
+                if n % 3 == 0:
+                    offset += 2
+            y += 1
+            nRow += 1
+        window.addstr(y, gap, dashRow)
+
+    def flashCellValues(self, cells: Cell | list[Cell], values: int | list[int] = None, attrs: int | list[int] = None, delay: float = 0.2):
+        attrList = listify(attrs) if attrs is not None else [None]
+        valList = listify(values) if values is not None else [None]
+        cellList = listify(cells)
+        pause = delay / (len(attrList) * len(valList))
+        for attr in attrList:
+            for val in valList:
+                for cell in cellList:
+                    v = val
+                    if v is None:
+                        v = cell.value
+                        if v is None:
+                            v = " "
+                    if attr is None:
+                        attr = curses.A_REVERSE | self.attr(cell)
+                    self.window.addstr(*self.drawPos[cell], str(v), attr)
+                self.window.refresh()
+                time.sleep(pause)
+        # Put cells back as they were
+        for cell in cellList:
+            v = cell.value
+            if v is None:
+                v = " "
+            self.window.addstr(*self.drawPos[cell], str(v), self.attr(cell))
+        self.window.refresh()
+
+    def startPreview(self, su: 'sudoku'):
+        # Values found during a preview are drawn in yellow
+        self.previewCells = [cell for cell in su.board if not cell.complete()]
+        for cell in self.previewCells:
+            self.drawAttr[cell] = COLOR_PAIR[3]
+
+    def endPreview(self, su: 'sudoku'):
+        for cell in self.previewCells:
+            self.drawAttr.pop(cell, None)
+        self.previewCells = []
+        for cell in su.board:
+            if not cell.complete():
+                self.window.addstr(*self.drawPos[cell], " ")
+        self.window.refresh()
+
+
+def main(window: '_CursesWindow'):
+    from .data import hardest_puzzle as puzzle
+    su = sudoku()
+    su.view = CursesView(window)
+    su.load(puzzle)
+    su.view.draw(su)
+
+    text = "Any key to start"
+    y = 16
+    x = int(curses.COLS/2 - len(text)/2)
+    window.addstr(y, x, text)
+
+    window.getch()
+    window.addstr(y, x, text, curses.A_REVERSE)
+    window.refresh()
+    time.sleep(0.2)
+    window.addstr(y, x, text)
+    window.refresh()
+    time.sleep(0.1)
+    window.addstr(y, x, " " * len(text))
+    window.refresh()
+
+    try:
+        su.solve()
+    except PuzzleSolved:
+        pass
+
+    if su.solved():
+        text = "Solved!"
+    else:
+        text = "Stuck! :("
+    x = int(curses.COLS/2 - len(text)/2)
+    window.addstr(y, x, text)
+
+    window.getch()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(filename="sudoku_log", level=logging.INFO, filemode='w')
+    curses.wrapper(main)
@@ -1,12 +1,17 @@
-from typing import Generator, Callable, TypeAlias, TypeVar, TYPE_CHECKING
-import curses
+from typing import Generator, Callable, Iterable, TypeAlias, TypeVar, TYPE_CHECKING
+from collections import deque
+from itertools import combinations
+from array import array
 import time
 
 import logging
-logging.basicConfig(filename="sudoku_log", level=logging.INFO, filemode='w')
+# The solver core does not configure logging or import curses so that it is cheap
+# to import in command line tools and worker processes. The curses UI in render.py
+# does both.
+logger = logging.getLogger(__name__)
 
 if TYPE_CHECKING:
-    from curses import _CursesWindow
+    from .render import CursesView
 
 class PuzzleSolved(Exception):
     pass
@@ -17,8 +22,51 @@ class BadPuzzleState(Exception):
 class LookAheadExceeded(Exception):
     pass
 
+class TimeBudgetExceeded(Exception):
+    pass
+
+class PuzzleError:
+    """A single problem found by sudoku.validate(). Row, col and value are set
+    where they apply. Rows, cols and boxes are numbered from 0"""
+
+    DUPLICATE = "duplicate"
+    NO_CANDIDATES = "no_candidates"
+    NO_PLACE = "no_place"
+    TOO_FEW_GIVENS = "too_few_givens"
+
+    def __init__(self, reason: str, message: str, group: str = None, row: int = None, col: int = None, value: int = None):
+        self.reason = reason
+        self.message = message
+        self.group = group
+        self.row = row
+        self.col = col
+        self.value = value
+
+    def __str__(self):
+        return self.message
+
+    def __repr__(self):
+        return "PuzzleError({!r}, {!r})".format(self.reason, self.message)
+
+class InvalidPuzzle(BadPuzzleState):
+    """Raised on load when a puzzle fails validation. errors lists every problem found"""
+
+    def __init__(self, errors: list[PuzzleError]):
+        super().__init__("; ".join(str(e) for e in errors))
+        self.errors = errors
+
 COLOR_PAIR = [0,0,0,0]
 
+# Fewer givens than this can never have a unique solution
+MIN_GIVENS = 17
+
+# Bit mask of all values, bit n is set for value n
+ALL_VALUES = 0b1111111110
+
+# Orderings used by tryAllValues() when picking cells and values to trial
+ROW_MAJOR = "rowMajor"
+MRV = "mrv"
+
 T = TypeVar('T')
 
 def listify(itemOrList: T | list[T]) -> list[T]:
@@ -27,104 +75,147 @@ def listify(itemOrList: T | list[T]) -> list[T]:
     except TypeError:
         return [itemOrList]
 
+def bitIndexes(mask: int) -> Generator[int, None, None]:
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+# Board geometry as bit masks over cell indexes, bit r*9+c is the cell at row r col c
+ROW_MASKS = [0x1FF << (r * 9) for r in range(9)]
+COL_MASKS = [sum(1 << (r * 9 + c) for r in range(9)) for c in range(9)]
+BOX_MASKS = [sum(1 << ((b // 3 * 3 + i // 3) * 9 + b % 3 * 3 + i % 3) for i in range(9)) for b in range(9)]
+UNIT_MASKS = ROW_MASKS + COL_MASKS + BOX_MASKS
+# The cells each cell can see, not including itself
+PEER_MASKS = [(ROW_MASKS[i // 9] | COL_MASKS[i % 9] | BOX_MASKS[i // 27 * 3 + i % 9 // 3]) & ~(1 << i) for i in range(81)]
+# The same geometry as cell indexes. Shared by every board so that the groups do not each
+# need their own list of cells
+ROW_INDEXES = tuple(tuple(bitIndexes(mask)) for mask in ROW_MASKS)
+COL_INDEXES = tuple(tuple(bitIndexes(mask)) for mask in COL_MASKS)
+BOX_INDEXES = tuple(tuple(bitIndexes(mask)) for mask in BOX_MASKS)
+UNIT_INDEXES = ROW_INDEXES + COL_INDEXES + BOX_INDEXES
+# The row, col and box each cell is in, numbered as in UNIT_MASKS
+CELL_UNITS = tuple((i // 9, 9 + i % 9, 18 + i // 27 * 3 + i % 9 // 3) for i in range(81))
+# The cells each cell can see, in row then col then box order
+PEER_INDEXES = tuple(tuple(dict.fromkeys(j for unit in CELL_UNITS[i] for j in UNIT_INDEXES[unit] if j != i)) for i in range(81))
+
 class Cell:
+    # Many boards may be held in memory so a board keeps its state in flat arrays and a
+    # Cell is only a view of one place in them. Views are made as they are needed, so two
+    # views of the same cell compare equal. Drawing state is kept by the view in render.py
+    __slots__ = ("su", "index")
 
-    def __init__(self) -> None:
-        self.row: CellRow = None
-        self.col: CellCol = None
-        self.box: CellBox = None
-        self.value: int = None
-        self.potentialValues: list[int] = []
-        self.drawPos = None 
-        self.drawAtrr = 0
-        self._snapshot = None
+    def __init__(self, su: 'sudoku', index: int) -> None:
+        self.su = su
+        self.index = index
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Cell) and other.su is self.su and other.index == self.index
+
+    def __hash__(self) -> int:
+        return self.index
+
+    def __repr__(self) -> str:
+        return "Cell(row={}, col={})".format(self.index // 9, self.index % 9)
+
+    @property
+    def value(self) -> int | None:
+        return self.su.values[self.index] or None
+
+    @property
+    def potentials(self) -> int:
+        """Bit mask of the values this cell could still be, bit n is set for value n"""
+        return self.su.potentials[self.index]
+
+    @potentials.setter
+    def potentials(self, mask: int):
+        self.su.potentials[self.index] = mask
+
+    @property
+    def potentialValues(self) -> list[int]:
+        return list(bitIndexes(self.su.potentials[self.index]))
+
+    @property
+    def row(self) -> 'CellRow':
+        return self.su.rows[self.index // 9]
+
+    @property
+    def col(self) -> 'CellCol':
+        return self.su.cols[self.index % 9]
+
+    @property
+    def box(self) -> 'CellBox':
+        return self.su.boxes[self.index // 27 * 3 + self.index % 9 // 3]
 
     def complete(self) -> bool:
-        return self.value is not None
+        return self.su.values[self.index] != 0
     
     def setValue(self, value:int):
-        if self.value is not None:
+        su = self.su
+        if su.values[self.index] != 0:
             raise Exception("Value already set")
-        self.value = value
-        self.potentialValues = []
-        for group in self.groups():
-            group.completed += 1
+        su.values[self.index] = value
+        su.potentials[self.index] = 0
+        for unit in CELL_UNITS[self.index]:
+            su.groupValues[unit] |= 1 << value
 
         
     def groups(self) -> Generator['CellGroup', None, None]:
-        if self.row is None:
-            raise Exception("Cell is not in a row")
         yield self.row
-        if self.col is None:
-            raise Exception("Cell is not in a col")
         yield self.col
-        if self.box is None:
-            raise Exception("Cell is not in a box")
         yield self.box
 
     def isPotentialValue(self, value: int):
-        for group in self.groups():
-            if group.hasValue(value):
-                return False
-        return True
+        groupValues = self.su.groupValues
+        (r, c, b) = CELL_UNITS[self.index]
+        return (groupValues[r] | groupValues[c] | groupValues[b]) & (1 << value) == 0
     
-    def takeSnapshot(self):
-        if self.complete():
-            return
-        self._snapshot = self.potentialValues[:]
-        self.drawAtrr = COLOR_PAIR[3]
-
-    def restoreSnapshot(self):
-        if self._snapshot is None:
-            return
-        self.value = None
-        self.potentialValues = self._snapshot[:]
-        self._snapshot = None
-        self.drawAtrr = 0
-
 setCell: TypeAlias = Callable[[Cell, int], None]
 flashCellValues: TypeAlias = Callable[[Cell | list[Cell], int | list[int], int | list[int], float], None]
 
 class CellGroup:
+    # A view of one row, col or box of a board. unit numbers the group as in UNIT_MASKS
+    __slots__ = ("su", "unit", "indexes")
+
+    def __init__(self, su: 'sudoku', unit: int):
+        self.su = su
+        self.unit = unit
+        self.indexes = UNIT_INDEXES[unit]
 
-    def __init__(self, cells: list[Cell]):
-        self.cells = cells
-        self.completed: int = len([x for x in cells if x.complete()])
+    @property
+    def completed(self) -> int:
+        return self.su.groupValues[self.unit].bit_count()
 
     def complete(self) -> bool:
-        if self.completed > 9:
-            raise Exception("More than 9 completed cells in group!")
-        return self.completed == 9
-    
-    def recomputeCompleted(self):
-        self.completed = 0
-        for cell in self:
-            if cell.complete():
-                self.completed += 1
+        return self.su.groupValues[self.unit] == ALL_VALUES
 
     def __iter__(self):
-        for cell in self.cells:
-            yield cell
+        su = self.su
+        for i in self.indexes:
+            yield Cell(su, i)
 
     def hasValue(self, value: int):
-        for cell in self.cells:
-            if cell.value == value:
-                return True
-        return False
+        return self.su.groupValues[self.unit] & (1 << value) != 0
+
+    def places(self, value: int) -> list[int]:
+        """The indexes of the cells in this group that could be value"""
+        potentials = self.su.potentials
+        bit = 1 << value
+        return [i for i in self.indexes if potentials[i] & bit]
     
     def processPotentials(self, setCell: setCell):
-        logging.debug("Check group {}".format(self))
+        logger.debug("Check group {}".format(self))
         for x in range(1,10):
             if self.hasValue(x):
-                logging.debug("{} is already in the group".format(x))
+                logger.debug("{} is already in the group".format(x))
                 continue
-            potentials = [c for c in self if x in c.potentialValues]
-            logging.debug("{} could be in {} cells in this group".format(x, len(potentials)))
-            if len(potentials) == 0:
+            places = self.places(x)
+            logger.debug("{} could be in {} cells in this group".format(x, len(places)))
+            if len(places) == 0:
                 raise BadPuzzleState("There are no potentials for {}. This should not happen. {}".format(x, ", ".join([str(c.potentialValues) for c in self])))
-            if len(potentials) == 1:
-                logging.info("There is only one option for {} in {} so call setCell()".format(x,self))
-                setCell(potentials[0], x)
+            if len(places) == 1:
+                logger.info("There is only one option for {} in {} so call setCell()".format(x,self))
+                setCell(Cell(self.su, places[0]), x)
 
     def findPairs(self, setCell: setCell, flashCellValues: flashCellValues):
         """We may not be able to pin a value to a unique cell, but if we have two numbers that can both only be
@@ -132,21 +223,21 @@ class CellGroup:
         pin down where the other numbers should be
         """
         pairs = []
-        logging.debug("Finding pairs in group {}".format(self))
+        logger.debug("Finding pairs in group {}".format(self))
         for x in range(1,10):
             if self.hasValue(x):
-                logging.debug("{} is already in the group".format(x))
+                logger.debug("{} is already in the group".format(x))
                 continue
-            potentials = [c for c in self if x in c.potentialValues]
-            logging.debug("{} could be in {} cells in this group".format(x, len(potentials)))
-            if len(potentials) == 0:
+            places = self.places(x)
+            logger.debug("{} could be in {} cells in this group".format(x, len(places)))
+            if len(places) == 0:
                 raise BadPuzzleState("There are no potentials for {}. This should not happen. {}".format(x, ", ".join([str(c.potentialValues) for c in self])))
-            if len(potentials) == 2:
-                logging.debug("We have found a pair")
-                pairs.append((x, (potentials[0], potentials[1])))
+            if len(places) == 2:
+                logger.debug("We have found a pair")
+                pairs.append((x, (places[0], places[1])))
         
         if len(pairs) > 1:
-            logging.debug("We have some pairs. Check if any are the same")
+            logger.debug("We have some pairs. Check if any are the same")
             for p1 in pairs:
                 (v1, cellPair1) = p1
                 it = iter(pairs)
@@ -155,22 +246,23 @@ class CellGroup:
                     p2 = next(it)
                 for p2 in it:
                     (v2, cellPair2) = p2
-                    logging.debug("Comparing pairs for values {} and {}".format(v1, v2))
+                    logger.debug("Comparing pairs for values {} and {}".format(v1, v2))
                     if cellPair1 == cellPair2:
-                        logging.debug("They are the same")
-                        logging.debug("Remove any possible values in these cells that are not the two values matched")
+                        logger.debug("They are the same")
+                        logger.debug("Remove any possible values in these cells that are not the two values matched")
                         doneFlash = False
-                        for cell in cellPair1:
+                        cells = [Cell(self.su, i) for i in cellPair1]
+                        for cell in cells:
                             
-                            if len(cell.potentialValues) > 2:
+                            if cell.potentials.bit_count() > 2:
                                 if not doneFlash:
                                     # Flash the values we are using in cyan the first time they are used
-                                    flashCellValues(cellPair1, (v1,v2), COLOR_PAIR[2], 0.4)
+                                    flashCellValues(cells, (v1,v2), COLOR_PAIR[2], 0.4)
                                     doneFlash = True
-                                logging.info("Adjusting possible values for pair of {} and {} in {}".format(v1, v2, self))
-                                logging.info("Potential values before {}".format(cell.potentialValues))
-                                cell.potentialValues = [v1, v2]
-                                logging.info("Potential values after {}".format(cell.potentialValues))
+                                logger.info("Adjusting possible values for pair of {} and {} in {}".format(v1, v2, self))
+                                logger.info("Potential values before {}".format(cell.potentialValues))
+                                cell.potentials = (1 << v1) | (1 << v2)
+                                logger.info("Potential values after {}".format(cell.potentialValues))
                                 # Process the effected groups
                                 for group in cell.groups():
                                     if not group.complete():
@@ -184,21 +276,21 @@ class CellGroup:
         """As with find pairs if we have three values that share the same three cells this must be exclusive to any other values
         """
         groupings = []
-        logging.debug("Finding groups of {} in group {}".format(groupSize, self))
+        logger.debug("Finding groups of {} in group {}".format(groupSize, self))
         for x in range(1,10):
             if self.hasValue(x):
-                logging.debug("{} is already in the group".format(x))
+                logger.debug("{} is already in the group".format(x))
                 continue
-            potentials = [c for c in self if x in c.potentialValues]
-            logging.debug("{} could be in {} cells in this group".format(x, len(potentials)))
-            if len(potentials) == 0:
+            places = self.places(x)
+            logger.debug("{} could be in {} cells in this group".format(x, len(places)))
+            if len(places) == 0:
                 raise BadPuzzleState("There are no potentials for {}. This should not happen. {}".format(x, ", ".join([str(c.potentialValues) for c in self])))
-            if len(potentials) == groupSize:
-                logging.debug("We have found a group of {}".format(groupSize))
-                groupings.append((x, potentials))
+            if len(places) == groupSize:
+                logger.debug("We have found a group of {}".format(groupSize))
+                groupings.append((x, places))
         
         if len(groupings) >= groupSize:
-            logging.info("We have some groups of {} in {}. Check if any three are the same".format(groupSize, self))
+            logger.info("We have some groups of {} in {}. Check if any three are the same".format(groupSize, self))
             for t1 in groupings:
                 (v1, cellGrouping1) = t1
                 it = iter(groupings)
@@ -208,26 +300,28 @@ class CellGroup:
                 matched = []
                 for t2 in it:
                     (v2, cellGrouping2) = t2
-                    logging.info("Comparing groupings for values {} and {}".format(v1, v2))
+                    logger.info("Comparing groupings for values {} and {}".format(v1, v2))
                     if cellGrouping1 == cellGrouping2:
-                        logging.info("They are the same")
+                        logger.info("They are the same")
                         matched.append(v2)
                         if len(matched) < groupSize - 1:
-                            logging.info("Need to find more")
+                            logger.info("Need to find more")
                         elif len(matched) == groupSize - 1:
-                            logging.info("Found all groupings to make an exclusive set. Remove any other potential values")
+                            logger.info("Found all groupings to make an exclusive set. Remove any other potential values")
                             doneFlash = False
-                            for cell in cellGrouping1:
-                                if not isinstance(cell, Cell):
-                                    raise Exception("Not a cell")
-                                logging.info("Potential values before {}".format(cell.potentialValues))
-                                if len(cell.potentialValues) > groupSize:
+                            cells = [Cell(self.su, i) for i in cellGrouping1]
+                            mask = 0
+                            for v in (v1, *matched):
+                                mask |= 1 << v
+                            for cell in cells:
+                                logger.info("Potential values before {}".format(cell.potentialValues))
+                                if cell.potentials.bit_count() > groupSize:
                                     if not doneFlash:
                                         # Flash the values we are using in cyan the first time they are used
-                                        flashCellValues(cellGrouping1, [v1, *matched], COLOR_PAIR[2], 0.4)
+                                        flashCellValues(cells, [v1, *matched], COLOR_PAIR[2], 0.4)
                                         doneFlash = True
-                                    cell.potentialValues = [v1, *matched]
-                                    logging.info("Potential values after {}".format(cell.potentialValues))
+                                    cell.potentials = mask
+                                    logger.info("Potential values after {}".format(cell.potentialValues))
                                     # Process the effected groups
                                     for group in cell.groups():
                                         if not group.complete():
@@ -235,23 +329,15 @@ class CellGroup:
 
 
 class CellRow(CellGroup):
-
-    def __init__(self, cells: list[Cell]):
-        super().__init__(cells)
-        for cell in cells:
-            cell.row = self
+    __slots__ = ()
 
     def stringValue(self):
-        values = [str(c.value) if c.value is not None else '.' for c in self]
-        return "".join(values)
+        values = self.su.values
+        return "".join(str(values[i]) if values[i] != 0 else '.' for i in self.indexes)
 
 
 class CellCol(CellGroup):
-
-    def __init__(self, cells: list[Cell]):
-        super().__init__(cells)
-        for cell in cells:
-            cell.col = self
+    __slots__ = ()
 
 def inSameRow(cells: list[Cell]) -> bool:
     lastRow = None
@@ -270,36 +356,33 @@ def inSameCol(cells: list[Cell]) -> bool:
     return True
 
 class CellBox(CellGroup):
-
-    def __init__(self, cells: list[Cell]):
-        super().__init__(cells)
-        for cell in cells:
-            cell.box = self
+    __slots__ = ()
 
     def findRowsAndCols(self, setCell: setCell, flashCellValues: flashCellValues):
         """We may not be able to pin a value to a unique cell, but if all the possible cells for a value in a box
         occur in the same row or column, then we can use this fact to eliminate this value as a possibility in
         the cells of the same row or column in the other boxes.
         """
-        logging.debug("Check for values in the same row or column in box {}".format(self))
+        logger.debug("Check for values in the same row or column in box {}".format(self))
         for x in range(1,10):
             if self.hasValue(x):
-                logging.debug("{} is already in the box".format(x))
+                logger.debug("{} is already in the box".format(x))
                 continue
-            potentialCells = [c for c in self if x in c.potentialValues]
-            logging.debug("{} could be in {} cells in this group".format(x, len(potentialCells)))
-            if len(potentialCells) == 0:
+            places = self.places(x)
+            logger.debug("{} could be in {} cells in this group".format(x, len(places)))
+            if len(places) == 0:
                 raise BadPuzzleState("There are no potentials for {}. This should not happen. {}".format(x, ", ".join([str(c.potentialValues) for c in self])))
             groupToUpdate = None
-            if len(potentialCells) <= 3:
-                logging.debug("Check if these cells are in the same row or column")
+            if len(places) <= 3:
+                logger.debug("Check if these cells are in the same row or column")
+                potentialCells = [Cell(self.su, i) for i in places]
                 if inSameRow(potentialCells):
-                    logging.info("Cells for value {} in {} are all in the same row.".format(x, self))
-                    logging.debug("Update the potential value for the other cells in this row")
+                    logger.info("Cells for value {} in {} are all in the same row.".format(x, self))
+                    logger.debug("Update the potential value for the other cells in this row")
                     groupToUpdate = potentialCells[0].row
                 elif inSameCol(potentialCells):
-                    logging.info("Cells for value {} in {} are all in the same column.".format(x, self))
-                    logging.debug("Update the potential value for the other cells in this column")
+                    logger.info("Cells for value {} in {} are all in the same column.".format(x, self))
+                    logger.debug("Update the potential value for the other cells in this column")
                     groupToUpdate = potentialCells[0].col
             if groupToUpdate is not None:
                 doneFlash = False
@@ -309,18 +392,18 @@ class CellBox(CellGroup):
                         continue
                     if cell.complete():
                         continue
-                    if x in cell.potentialValues:
+                    if cell.potentials & (1 << x):
                         if not doneFlash:
                             # Flash the values we are using in red the first time they are used
                             flashCellValues(potentialCells, x, COLOR_PAIR[1], 0.4)
                             doneFlash = True
-                        logging.info("Potential values before {}".format(cell.potentialValues))
-                        cell.potentialValues.remove(x)
-                        logging.info("Potential values after {}".format(cell.potentialValues))
-                        if len(cell.potentialValues) == 0:
+                        logger.info("Potential values before {}".format(cell.potentialValues))
+                        cell.potentials &= ~(1 << x)
+                        logger.info("Potential values after {}".format(cell.potentialValues))
+                        if cell.potentials == 0:
                             raise BadPuzzleState("Cell has no remaining potential values")
-                        if len(cell.potentialValues) == 1:
-                            logging.info("Only one potential value left. Call setCell() with this value: {}".format(cell.potentialValues[0]))
+                        if cell.potentials.bit_count() == 1:
+                            logger.info("Only one potential value left. Call setCell() with this value: {}".format(cell.potentialValues[0]))
                             setCell(cell, cell.potentialValues[0])
                         else:
                             # Process the effected groups
@@ -331,129 +414,132 @@ class CellBox(CellGroup):
 
 
 class sudoku:
-
-    def __init__(self) -> None:
-        self.cells: list[list[Cell]] = []
-        for i in range(9):
-            row: list[Cell] = []
-            for j in range(9):
-                row.append(Cell())
-            self.cells.append(row)
-        # Create the rows
-        self.rows: list[CellRow] = []
-        for i in range(9):
-            self.rows.append(CellRow(self.cells[i]))
-        # Create the cols
-        self.cols: list[CellCol] = []
-        for i in range(9):
-            colCells = [row[i] for row in self.cells]
-            self.cols.append(CellCol(colCells))
-        # Create the boxes
-        self.boxes: list[CellBox] = []
-        indexes = [[0,1,2], [3,4,5], [6,7,8]]
-        for i in range(3):
-            for j in range(3):
-                boxCells: list[Cell] = []
-                for y in indexes[i]:
-                    row = self.cells[y]
-                    for x in indexes[j]:
-                        boxCells.append(row[x])
-                self.boxes.append(CellBox(boxCells))
+    __slots__ = ("values", "potentials", "groupValues", "rows", "cols", "boxes", "view", "foundThisPass", "trialOrder",
+                 "trials", "deadline", "_inPreview", "_lookahead", "_foundThisPass", "_snapshot")
+
+    def __init__(self, trialOrder: str = ROW_MAJOR) -> None:
+        if trialOrder not in (ROW_MAJOR, MRV):
+            raise Exception("Unknown trial order {}".format(trialOrder))
+        # The board is kept in flat arrays in row order, Cell and CellGroup are views of them.
+        # A value of 0 is a blank cell and potentials are bit masks with bit n set for value n
+        self.values = bytearray(81)
+        self.potentials = array('H', [0]) * 81
+        # Bit mask of the values in each row, col and box, numbered as in UNIT_MASKS
+        self.groupValues = array('H', [0]) * 27
+        self.rows: list[CellRow] = [CellRow(self, r) for r in range(9)]
+        self.cols: list[CellCol] = [CellCol(self, 9 + c) for c in range(9)]
+        self.boxes: list[CellBox] = [CellBox(self, 18 + b) for b in range(9)]
         # For drawing
-        self.window: '_CursesWindow' = None
+        self.view: 'CursesView' = None
         # To check if we are stuck
         self.foundThisPass: int = 0
-
-    def load(self, puzzleData: str):
+        # How tryAllValues() picks what to trial and how many trials it has made
+        self.trialOrder: str = trialOrder
+        self.trials: int = 0
+        # Optional time.perf_counter() value after which solve() gives up
+        self.deadline: float = None
+
+    @property
+    def board(self) -> tuple[Cell, ...]:
+        """Every cell in row order. The cells are views made on each call"""
+        return tuple(Cell(self, i) for i in range(81))
+
+    @property
+    def cells(self) -> list[tuple[Cell, ...]]:
+        """The cells as a list of rows"""
+        board = self.board
+        return [board[i:i + 9] for i in range(0, 81, 9)]
+
+    def load(self, puzzleData: str, minGivens: int = MIN_GIVENS):
         lines = [line for line in puzzleData.splitlines() if len(line) > 0 and not '-' in line]
         if len(lines) != 9:
             raise Exception("Unexpected number of lines. Expect 9 got {}".format(len(lines)))
+        flat = ""
         for i in range(9):
-            row = self.cells[i]
             chars = [c for c in lines[i] if c != '|']
             if len(chars) != 9:
                 raise Exception("Unexpected number of chars. Expected 9 got [{}]".format(lines[i]))
-            for j in range(9):
-                if chars[j] != " ":
-                    row[j].setValue(int(chars[j]))
-                    row[j].drawAtrr = curses.A_BOLD
-
-    def draw(self, window: '_CursesWindow'):
-        global COLOR_PAIR
-        window.clear()
-        curses.curs_set(False)
-        curses.init_pair(1, curses.COLOR_RED, curses.COLOR_BLACK)
-        curses.init_pair(2, curses.COLOR_CYAN, curses.COLOR_BLACK)
-        curses.init_pair(3, curses.COLOR_YELLOW, curses.COLOR_BLACK)
-        for i in range(1,4):
-            COLOR_PAIR[i] = curses.color_pair(i)
-        width = (3 + 4) * 3 + 4
-        gap = int((curses.COLS - width) / 2)
-        dashRow = "-" * width
-        start = 2
-        y = start
-        nRow = 0
-        for row in self.cells:
-            if nRow % 3 == 0:
-                window.addstr(y, gap, dashRow)
-                y += 1
-            for j in range(4):
-                window.addch(y, gap + j*8, "|")
-            offset = gap + 2
-            n = 0
-            for cell in row:
-                if cell.complete():
-                    window.addstr(y, offset, str(cell.value), cell.drawAtrr)
-                cell.drawPos = (y, offset)
-                offset += 2
-                n += 1
-                if n % 3 == 0:
-                    offset += 2
-            y += 1
-            nRow += 1
-        window.addstr(y, gap, dashRow)
+            flat += "".join(chars)
+        self.loadFlat(flat, minGivens)
+
+    def loadFlat(self, puzzleData: str, minGivens: int = MIN_GIVENS):
+        """Load a puzzle given as 81 chars in row order. Blank cells may be ' ', '.' or '0'.
+        Raises InvalidPuzzle if the givens fail validate()"""
+        if len(puzzleData) != 81:
+            raise Exception("Unexpected number of chars. Expected 81 got {}".format(len(puzzleData)))
+        for i in range(81):
+            c = puzzleData[i]
+            if c in " .0":
+                continue
+            if c not in "123456789":
+                raise Exception("Unexpected char [{}] at position {}".format(c, i))
+            cell = self.cellAt(i)
+            cell.setValue(int(c))
+            if self.view is not None:
+                self.view.markGiven(cell)
+        errors = self.validate(minGivens)
+        if len(errors) > 0:
+            raise InvalidPuzzle(errors)
+
+    def validate(self, minGivens: int = MIN_GIVENS) -> list[PuzzleError]:
+        """Check the values set so far for problems that mean the puzzle cannot be solved,
+        without doing any solving. Returns a list of the problems found"""
+        errors = []
+        rowMasks = [0] * 9
+        colMasks = [0] * 9
+        boxMasks = [0] * 9
+        givens = 0
+        for r in range(9):
+            for c in range(9):
+                value = self.values[r * 9 + c]
+                if value == 0:
+                    continue
+                givens += 1
+                bit = 1 << value
+                b = (r // 3) * 3 + c // 3
+                for (masks, i, kind) in ((rowMasks, r, "row"), (colMasks, c, "col"), (boxMasks, b, "box")):
+                    if masks[i] & bit:
+                        errors.append(PuzzleError(PuzzleError.DUPLICATE, "{} is repeated in {} {}".format(value, kind, i), "{} {}".format(kind, i), r, c, value))
+                    masks[i] |= bit
+        if givens < minGivens:
+            errors.append(PuzzleError(PuzzleError.TOO_FEW_GIVENS, "Only {} givens, need at least {}".format(givens, minGivens)))
+        # Work out the candidates for each empty cell, and which values each group has room for
+        rowRoom = [0] * 9
+        colRoom = [0] * 9
+        boxRoom = [0] * 9
+        for r in range(9):
+            for c in range(9):
+                if self.values[r * 9 + c] != 0:
+                    continue
+                b = (r // 3) * 3 + c // 3
+                candidates = ALL_VALUES & ~(rowMasks[r] | colMasks[c] | boxMasks[b])
+                if candidates == 0:
+                    errors.append(PuzzleError(PuzzleError.NO_CANDIDATES, "Cell at row {} col {} has no candidates".format(r, c), row=r, col=c))
+                rowRoom[r] |= candidates
+                colRoom[c] |= candidates
+                boxRoom[b] |= candidates
+        for (masks, room, kind) in ((rowMasks, rowRoom, "row"), (colMasks, colRoom, "col"), (boxMasks, boxRoom, "box")):
+            for i in range(9):
+                missing = ALL_VALUES & ~(masks[i] | room[i])
+                for value in range(1, 10):
+                    if missing & (1 << value):
+                        errors.append(PuzzleError(PuzzleError.NO_PLACE, "{} has nowhere to go in {} {}".format(value, kind, i), "{} {}".format(kind, i), value=value))
+        return errors
+
+    def flatValue(self) -> str:
+        """The board as 81 chars in row order with '.' for blank cells"""
+        return "".join(row.stringValue() for row in self.rows)
 
     def flashCellValues(self, cells: Cell | list[Cell], values: int | list[int] = None, attrs: int | list[int] = None, delay: float = 0.2):
-        if self.window is None:
+        if self.view is None:
             return
-        attrList = listify(attrs) if attrs is not None else [None]
-        valList = listify(values) if values is not None else [None]
-        cellList = listify(cells)
-        pause = delay / (len(attrList) * len(valList))
-        for attr in attrList:
-            for val in valList:
-                for cell in cellList:
-                    v = val
-                    if v is None:
-                        v = cell.value
-                        if v is None:
-                            v = " "
-                    if attr is None:
-                        attr = curses.A_REVERSE | cell.drawAtrr
-                    self.window.addstr(cell.drawPos[0], cell.drawPos[1], str(v), attr)
-                self.window.refresh()
-                time.sleep(pause)
-        # Put cells back as they were
-        for cell in cellList:
-            v = cell.value
-            if v is None:
-                v = " "
-            self.window.addstr(cell.drawPos[0], cell.drawPos[1], str(v), cell.drawAtrr)
-        self.window.refresh()        
-
-
-
-
-        
+        self.view.flashCellValues(cells, values, attrs, delay)
     
     def solved(self):
-        for row in self.rows:
-            if not row.complete():
-                return False
-        return True
+        return 0 not in self.values
     
     def setCell(self, cell:Cell, value: int):
-        logging.info("setCell: value={}".format(value))
+        logger.info("setCell: value={}".format(value))
         if not cell.isPotentialValue(value):
             raise BadPuzzleState("Trying to set value for a cell that is not allowed")
         cell.setValue(value)
@@ -463,41 +549,46 @@ class sudoku:
             if self.foundThisPass - self._foundThisPass > self._lookahead:
                 raise LookAheadExceeded()
         if self.solved():
-            logging.info("Puzzle solved after setCell")
+            logger.info("Puzzle solved after setCell")
             raise PuzzleSolved()
         # Remove this value as a potential value from the cells groups
-        toSet: list[cell] = []
-        for group in cell.groups():
-            logging.debug("Removing potential value from cells in {}".format(group))
-            if group.complete():
-                logging.debug("group is complete skipping")
+        potentials = self.potentials
+        bit = 1 << value
+        toSet: list[int] = []
+        # The groups of the last cell looked at are processed at the end
+        last = cell.index
+        for unit in CELL_UNITS[cell.index]:
+            logger.debug("Removing potential value from cells in group {}".format(unit))
+            if self.groupValues[unit] == ALL_VALUES:
+                logger.debug("group is complete skipping")
                 continue
-            for cell in group:
-                if cell.complete():
-                    continue
-                if value in cell.potentialValues:
-                    logging.info("Potential values before {}".format(cell.potentialValues))
-                    cell.potentialValues.remove(value)
-                    logging.info("Potential values after {}".format(cell.potentialValues))
-                    if len(cell.potentialValues) == 0:
+            for i in UNIT_INDEXES[unit]:
+                last = i
+                # Complete cells have no potential values so are skipped here
+                if potentials[i] & bit:
+                    logger.info("Potential values before {}".format(list(bitIndexes(potentials[i]))))
+                    potentials[i] &= ~bit
+                    logger.info("Potential values after {}".format(list(bitIndexes(potentials[i]))))
+                    if potentials[i] == 0:
                         raise BadPuzzleState("Number of potential values for a cell has reached zero")
-                    if len(cell.potentialValues) == 1:
-                        logging.info("Only one potential value left {}. Add to list of cells to set".format(cell.potentialValues[0]))
+                    if potentials[i].bit_count() == 1:
+                        logger.info("Only one potential value left {}. Add to list of cells to set".format(potentials[i].bit_length() - 1))
                         # Set this cell, but only after we have finished updating the potential values of the other cells
-                        toSet.append(cell)
+                        toSet.append(i)
         # Now update the other cells that now have only one potential value left
         if len(toSet) > 0:
-            logging.info("Process list of new cells to set that now have only one potential value")
-            for cell in toSet:
-                if cell.complete():
+            logger.info("Process list of new cells to set that now have only one potential value")
+            for i in toSet:
+                last = i
+                if self.values[i] != 0:
                     # Already set as a consequence of a previous setCell
                     continue
-                self.setCell(cell, cell.potentialValues[0])
+                self.setCell(Cell(self, i), potentials[i].bit_length() - 1)
         # Process the effected groups
-        for group in cell.groups():
+        for group in Cell(self, last).groups():
             if not group.complete():
                 group.processPotentials(self.setCell)
-        logging.info("End of setCell()")
+        logger.info("End of setCell()")
 
     def groups(self):
         for r in self.rows:
@@ -509,11 +600,12 @@ class sudoku:
 
     def startPreview(self):
         self._foundThisPass = self.foundThisPass
-        for row in self.cells:
-            for cell in row:
-                cell.takeSnapshot()
+        # Snapshot the board, this is only held during a preview
+        self._snapshot = self.saveState()
         self._inPreview = True
         self._lookahead = 10
+        if self.view is not None:
+            self.view.startPreview(self)
 
     def endPreview(self):
         if not hasattr(self, "_inPreview"):
@@ -521,22 +613,23 @@ class sudoku:
         delattr(self, "_inPreview")
         delattr(self, "_lookahead")
 
-        for row in self.cells:
-            for cell in row:
-                cell.restoreSnapshot()
-                if not cell.complete() and self.window is not None:
-                    self.window.addstr(cell.drawPos[0], cell.drawPos[1], " ")
-        if self.window is not None:
-            self.window.refresh()
-        for group in self.groups():
-            # Need to revert completed count
-            group.recomputeCompleted()
+        (self.values, self.potentials, self.groupValues) = self._snapshot
+        delattr(self, "_snapshot")
+        if self.view is not None:
+            self.view.endPreview(self)
         if hasattr(self,"_foundThisPass"):
             self.foundThisPass = self._foundThisPass
             delattr(self, "_foundThisPass")
 
+    def checkDeadline(self):
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise TimeBudgetExceeded()
+
     def trialValue(self, cell: Cell, value: int) -> bool:
-        logging.info("Trialing {} in {}".format(value, cell))
+        # Trials are the slow part of a pass so check the time budget before each one
+        self.checkDeadline()
+        logger.info("Trialing {} in {}".format(value, cell))
+        self.trials += 1
         self.startPreview()
         initialCount = self.foundThisPass
         try:
@@ -550,9 +643,9 @@ class sudoku:
         except BadPuzzleState:
             # Remove this value from potentials
             self.endPreview()
-            logging.info("{} is not a potential for {} within lookahead".format(value, cell))
-            cell.potentialValues.remove(value)
-            if len(cell.potentialValues) == 0:
+            logger.info("{} is not a potential for {} within lookahead".format(value, cell))
+            cell.potentials &= ~(1 << value)
+            if cell.potentials == 0:
                 raise BadPuzzleState("No remaining potential values")
             for group in cell.groups():
                 group.processPotentials(self.setCell)
@@ -560,43 +653,280 @@ class sudoku:
                 
         
         self.endPreview()
-        logging.info("End of trial")
+        logger.info("End of trial")
         return False
 
+    def peers(self, cell: Cell) -> set[Cell]:
+        return {Cell(self, i) for i in PEER_INDEXES[cell.index]}
+
+    def trialCells(self) -> list[Cell]:
+        cells = [Cell(self, i) for i in range(81) if self.values[i] == 0]
+        if self.trialOrder == ROW_MAJOR:
+            return cells
+        # Minimum remaining values first. Break ties on degree, the cell with
+        # the most incomplete peers constrains the most of the rest of the board.
+        def key(cell: Cell):
+            degree = len([p for p in PEER_INDEXES[cell.index] if self.values[p] == 0])
+            return (cell.potentials.bit_count(), -degree)
+        return sorted(cells, key=key)
+
+    def trialValues(self, cell: Cell) -> list[int]:
+        values = cell.potentialValues
+        if self.trialOrder == ROW_MAJOR:
+            return values
+        # Least constraining value first, i.e. the one ruled out of the fewest peers
+        peers = [p for p in PEER_INDEXES[cell.index] if self.values[p] == 0]
+        return sorted(values, key=lambda v: len([p for p in peers if self.potentials[p] & (1 << v)]))
+
     def tryAllValues(self):
-        for row in self.cells:
-            for cell in row:
-                if cell.complete():
-                    continue
-                # Take copy
-                trialValues = cell.potentialValues[:]
-                #trialValues.reverse()
-                for val in trialValues:
-                    doneSomething = self.trialValue(cell, val)
-                    if doneSomething:
-                        return
-                   
+        for cell in self.trialCells():
+            if cell.complete():
+                continue
+            for val in self.trialValues(cell):
+                doneSomething = self.trialValue(cell, val)
+                if doneSomething:
+                    return
 
 
-    def solve(self):
+    def initPotentials(self):
         # Set the potential values
-        logging.info("Set the inital potential values")
+        logger.info("Set the inital potential values")
         initiallySolved = []
-        for row in self.cells:
-            for cell in row:
-                if cell.complete():
-                    continue
-                cell.potentialValues = [x for x in range(1,10) if cell.isPotentialValue(x)]
-                if len(cell.potentialValues) == 1:
-                    # Solve this but only once we have finished the initialisation
-                    initiallySolved.append((cell, cell.potentialValues[0]))
+        groupValues = self.groupValues
+        for i in range(81):
+            if self.values[i] != 0:
+                continue
+            (r, c, b) = CELL_UNITS[i]
+            potentials = ALL_VALUES & ~(groupValues[r] | groupValues[c] | groupValues[b])
+            self.potentials[i] = potentials
+            if potentials == 0:
+                raise BadPuzzleState("Cell has no potential values")
+            if potentials.bit_count() == 1:
+                # Solve this but only once we have finished the initialisation
+                initiallySolved.append((i, potentials.bit_length() - 1))
         # Process the cells already solved
-        logging.info("Process initially solved cells")
-        for (cell, value) in initiallySolved:
-            self.setCell(cell, value)
-        logging.info("Process the groups")
-        for x in range(10):
-            logging.info("--- pass {} ---".format(x))
+        logger.info("Process initially solved cells")
+        for (i, value) in initiallySolved:
+            if self.values[i] != 0:
+                # Already set as a consequence of a previous setCell
+                continue
+            self.setCell(Cell(self, i), value)
+
+    def saveState(self) -> tuple[bytearray, array, array]:
+        return (self.values[:], self.potentials[:], self.groupValues[:])
+
+    def restoreState(self, state: tuple[bytearray, array, array]):
+        # Copy again as the same state may be restored more than once
+        (values, potentials, groupValues) = state
+        (self.values, self.potentials, self.groupValues) = (values[:], potentials[:], groupValues[:])
+
+    def iterSolutions(self) -> Generator[str, None, None]:
+        """Search for every solution from the current state, yielding each as a flat
+        81 char string as it is found. Call initPotentials() first. Only one saved
+        board state is held per level of the search so memory is bounded by depth.
+        """
+        if self.solved():
+            yield self.flatValue()
+            return
+        # Branch on the cell with the fewest potential values
+        index = min((i for i in range(81) if self.values[i] == 0), key=lambda i: self.potentials[i].bit_count())
+        cell = Cell(self, index)
+        state = self.saveState()
+        for value in cell.potentialValues:
+            try:
+                self.setCell(cell, value)
+            except PuzzleSolved:
+                yield self.flatValue()
+            except BadPuzzleState:
+                pass
+            else:
+                yield from self.iterSolutions()
+            self.restoreState(state)
+
+    def cellAt(self, index: int) -> Cell:
+        return Cell(self, index)
+
+    def candidateMasks(self) -> list[int]:
+        """For each value, a bit mask of the cells that could still hold it"""
+        masks = [0] * 10
+        index = 0
+        for potentials in self.potentials:
+            for value in bitIndexes(potentials):
+                masks[value] |= 1 << index
+            index += 1
+        return masks
+
+    def positionMasks(self, candidates: int) -> tuple[list[int], list[int]]:
+        """Split the cell mask for a value into the columns it could be in for each row
+        and the rows it could be in for each column"""
+        rowPositions = [(candidates >> (r * 9)) & 0x1FF for r in range(9)]
+        colPositions = [0] * 9
+        for r in range(9):
+            for c in bitIndexes(rowPositions[r]):
+                colPositions[c] |= 1 << r
+        return rowPositions, colPositions
+
+    def eliminate(self, indexes: Iterable[int], value: int, setCell: setCell) -> bool:
+        """Remove value as a potential from the given cells. Returns True if any were removed"""
+        removed = False
+        for index in indexes:
+            cell = self.cellAt(index)
+            if cell.potentials & (1 << value) == 0:
+                # Already dealt with as a consequence of a previous setCell
+                continue
+            logger.info("Potential values before {}".format(cell.potentialValues))
+            cell.potentials &= ~(1 << value)
+            logger.info("Potential values after {}".format(cell.potentialValues))
+            removed = True
+            if cell.potentials == 0:
+                raise BadPuzzleState("Cell has no remaining potential values")
+            if cell.potentials.bit_count() == 1:
+                logger.info("Only one potential value left. Call setCell() with this value: {}".format(cell.potentialValues[0]))
+                setCell(cell, cell.potentialValues[0])
+            else:
+                # Process the effected groups
+                for group in cell.groups():
+                    if not group.complete():
+                        group.processPotentials(setCell)
+        return removed
+
+    def eliminateAll(self, eliminations: list[int], setCell: setCell) -> bool:
+        """Apply eliminations gathered by a strategy, a bit mask of cells for each value.
+        Returns True if any potential values were removed"""
+        removed = False
+        for x in range(1, 10):
+            if eliminations[x] != 0:
+                removed = self.eliminate(bitIndexes(eliminations[x]), x, setCell) or removed
+        return removed
+
+    def findFish(self, size: int, setCell: setCell, flashCellValues: flashCellValues) -> bool:
+        """If the only places for a value in n rows all lie in the same n columns, then those
+        columns must take the value in those rows and it can be removed from the rest of the
+        columns. The same applies with rows and columns swapped. For n = 2 this is an X-Wing
+        and for n = 3 a Swordfish.
+        """
+        masks = self.candidateMasks()
+        eliminations = [0] * 10
+        for x in range(1, 10):
+            if masks[x] == 0:
+                continue
+            (rowPositions, colPositions) = self.positionMasks(masks[x])
+            for (positions, byRow) in ((rowPositions, True), (colPositions, False)):
+                lines = [i for i in range(9) if 2 <= positions[i].bit_count() <= size]
+                for baseLines in combinations(lines, size):
+                    cover = 0
+                    for i in baseLines:
+                        cover |= positions[i]
+                    if cover.bit_count() != size:
+                        continue
+                    baseMask = 0
+                    coverMask = 0
+                    for i in baseLines:
+                        baseMask |= ROW_MASKS[i] if byRow else COL_MASKS[i]
+                    for j in bitIndexes(cover):
+                        coverMask |= COL_MASKS[j] if byRow else ROW_MASKS[j]
+                    targets = masks[x] & coverMask & ~baseMask
+                    if targets == 0:
+                        continue
+                    logger.info("Found a fish of size {} for {} in {} {}".format(size, x, "rows" if byRow else "cols", baseLines))
+                    flashCellValues([self.cellAt(i) for i in bitIndexes(masks[x] & baseMask)], x, COLOR_PAIR[1], 0.4)
+                    eliminations[x] |= targets
+        return self.eliminateAll(eliminations, setCell)
+
+    def findColouring(self, setCell: setCell, flashCellValues: flashCellValues) -> bool:
+        """Where a value has only two places in a group, one of them must have it. Linking these
+        pairs into chains and colouring them alternately, one colour must be right. If two cells
+        of the same colour see each other that colour is wrong, and any other cell that sees both
+        colours cannot have the value.
+        """
+        masks = self.candidateMasks()
+        eliminations = [0] * 10
+        for x in range(1, 10):
+            candidates = masks[x]
+            links: dict[int, list[int]] = {}
+            for unit in UNIT_MASKS:
+                pair = candidates & unit
+                if pair.bit_count() == 2:
+                    (a, b) = bitIndexes(pair)
+                    links.setdefault(a, []).append(b)
+                    links.setdefault(b, []).append(a)
+            colour: dict[int, int] = {}
+            for start in links:
+                if start in colour:
+                    continue
+                # Colour this chain
+                colourMasks = [1 << start, 0]
+                colour[start] = 0
+                stack = [start]
+                while len(stack) > 0:
+                    i = stack.pop()
+                    for j in links[i]:
+                        if j not in colour:
+                            colour[j] = 1 - colour[i]
+                            colourMasks[colour[j]] |= 1 << j
+                            stack.append(j)
+                wrong = [c for c in (0, 1) if any(PEER_MASKS[i] & colourMasks[c] for i in bitIndexes(colourMasks[c]))]
+                if len(wrong) > 0:
+                    logger.info("Two cells coloured the same for {} see each other".format(x))
+                    flashCellValues([self.cellAt(i) for i in bitIndexes(colourMasks[wrong[0]])], x, COLOR_PAIR[1], 0.4)
+                    eliminations[x] |= colourMasks[wrong[0]]
+                    continue
+                targets = 0
+                for i in bitIndexes(candidates & ~(colourMasks[0] | colourMasks[1])):
+                    if PEER_MASKS[i] & colourMasks[0] and PEER_MASKS[i] & colourMasks[1]:
+                        targets |= 1 << i
+                if targets != 0:
+                    logger.info("Cells see both colours of a chain for {}".format(x))
+                    flashCellValues([self.cellAt(i) for i in bitIndexes(colourMasks[0] | colourMasks[1])], x, COLOR_PAIR[2], 0.4)
+                    eliminations[x] |= targets
+        return self.eliminateAll(eliminations, setCell)
+
+    def findXYChains(self, setCell: setCell, flashCellValues: flashCellValues) -> bool:
+        """Start from a cell with two potential values a and b. If it is not a then it is b, so a
+        cell it sees that has b and one other value must be that other value, and so on along a
+        chain of such cells. If the chain reaches a cell that must then be a, either the start or
+        the end cell is a, so a cannot be in any cell that sees both.
+        """
+        masks = self.candidateMasks()
+        eliminations = [0] * 10
+        potentials = self.potentials
+        bivalue = 0
+        for index in range(81):
+            if potentials[index].bit_count() == 2:
+                bivalue |= 1 << index
+        for start in bitIndexes(bivalue):
+            for a in bitIndexes(potentials[start]):
+                b = (potentials[start] & ~(1 << a)).bit_length() - 1
+                # Search the chain as (cell, value the cell must have if start is not a)
+                seen = {(start, b)}
+                queue = deque([(start, b)])
+                while len(queue) > 0:
+                    (i, v) = queue.popleft()
+                    for j in bitIndexes(PEER_MASKS[i] & bivalue & masks[v]):
+                        w = (potentials[j] & ~(1 << v)).bit_length() - 1
+                        if (j, w) in seen:
+                            continue
+                        seen.add((j, w))
+                        if w == a and j != start:
+                            targets = PEER_MASKS[start] & PEER_MASKS[j] & masks[a]
+                            if targets & ~eliminations[a]:
+                                logger.info("Found an XY chain for {}".format(a))
+                                flashCellValues([self.cellAt(start), self.cellAt(j)], a, COLOR_PAIR[2], 0.4)
+                                eliminations[a] |= targets
+                        queue.append((j, w))
+        return self.eliminateAll(eliminations, setCell)
+
+    def solve(self):
+        self.initPotentials()
+        logger.info("Process the groups")
+        # Passes that only removed potential values do not count towards the limit. Each
+        # one removes at least one so they cannot go on for ever, and the deadline still applies
+        passes = 0
+        x = 0
+        while passes < 10:
+            logger.info("--- pass {} ---".format(x))
+            x += 1
+            self.checkDeadline()
             self.foundThisPass = 0
             for group in self.groups():
                 group.processPotentials(self.setCell)
@@ -621,60 +951,45 @@ class sudoku:
                     # Look for grouping of n
                     for group in self.groups():
                         group.findGrouping(n, self.setCell, self.flashCellValues)
-            if self.foundThisPass == 0:
+            # These only remove potential values so note whether they did anything
+            eliminated = False
+            for n in (2, 3):
+                if self.foundThisPass == 0 and not eliminated:
+                    # Look for X-Wings then Swordfish
+                    eliminated = self.findFish(n, self.setCell, self.flashCellValues)
+            if self.foundThisPass == 0 and not eliminated:
+                # Look for chains of conjugate pairs for a single value
+                eliminated = self.findColouring(self.setCell, self.flashCellValues)
+            if self.foundThisPass == 0 and not eliminated:
+                # Look for chains of cells with two potential values
+                eliminated = self.findXYChains(self.setCell, self.flashCellValues)
+            if self.foundThisPass == 0 and not eliminated:
                 # Last resort
                 self.tryAllValues()
+            if self.foundThisPass > 0 or not eliminated:
+                passes += 1
 
             #if self.foundThisPass == 0:
             # We are stuck!
             #    break
-        logging.info("Stuck!")
+        logger.info("Stuck!")
         
 
-if __name__ == "__main__":
-    from curses import wrapper
-    from .data import hardest_puzzle as puzzle
-
-    def main(window: '_CursesWindow'):
-        su = sudoku()
-        su.window = window
-        su.load(puzzle)
-        su.draw(window)
-
-        text = "Any key to start"
-        y = 16
-        x = int(curses.COLS/2 - len(text)/2)
-        window.addstr(y, x, text)
-
-        window.getch()
-        window.addstr(y, x, text, curses.A_REVERSE)
-        window.refresh()
-        time.sleep(0.2)
-        window.addstr(y, x, text)
-        window.refresh()
-        time.sleep(0.1)
-        window.addstr(y, x, " " * len(text))
-        window.refresh()               
-
-        try:
-            su.solve()
-        except PuzzleSolved:
-            pass
-
-        if su.solved():
-            text = "Solved!"
+def iterSolutions(puzzle: str) -> Generator[str, None, None]:
+    """Lazily yield every solution to a puzzle in either the load() or loadFlat() format"""
+    su = sudoku()
+    try:
+        if "\n" in puzzle:
+            su.load(puzzle, minGivens=0)
         else:
-            text = "Stuck! :("
-        x = int(curses.COLS/2 - len(text)/2)
-        window.addstr(y, x, text)
-
-        window.getch()
-
-    wrapper(main)
-
-
-
-
-                 
-
-        
\ No newline at end of file
+            su.loadFlat(puzzle, minGivens=0)
+    except InvalidPuzzle:
+        return
+    try:
+        su.initPotentials()
+    except PuzzleSolved:
+        yield su.flatValue()
+        return
+    except BadPuzzleState:
+        return
+    yield from su.iterSolutions()
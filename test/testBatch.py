@@ -0,0 +1,29 @@
+import unittest
+from Sudoku.sudoku import sudoku
+from Sudoku.batch import solveBatch, SOLVED, BAD_PUZZLE, INVALID
+import Sudoku.data
+
+class TestBatch(unittest.TestCase):
+
+    def flat(self, puzzle):
+        su = sudoku()
+        su.load(puzzle)
+        return su.flatValue()
+
+    def test_solve_batch(self):
+        puzzles = [self.flat(Sudoku.data.puzzle1), self.flat(Sudoku.data.hardest_puzzle)]
+        puzzles.append("11" + "." * 79)
+        puzzles.append("x" * 81)
+        puzzles.append("too short")
+        puzzles.append("\u00e9" * 81)
+
+        boards, statuses = solveBatch(puzzles * 2, workers=2)
+
+        self.assertEqual(statuses, [SOLVED, SOLVED, BAD_PUZZLE, INVALID, INVALID, INVALID] * 2)
+        self.assertEqual(boards[4], "too short")
+        self.assertEqual(boards[5], "\u00e9" * 81)
+        self.assertEqual(boards[1], "697243185453816927812597364926781543341625798785439612134972856269358471578164239")
+        self.assertEqual(boards[2], puzzles[2])
+
+    def test_empty_batch(self):
+        self.assertEqual(solveBatch([]), ([], []))
@@ -0,0 +1,65 @@
+import unittest
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from Sudoku.__main__ import main
+
+puzzle = ".9...3......81.9..8.2..7...92....5...4.6..7....54..61213......6..9.5.........4..."
+solution = "697243185453816927812597364926781543341625798785439612134972856269358471578164239"
+
+class TestCli(unittest.TestCase):
+
+    def runSolve(self, lines, *options):
+        with tempfile.TemporaryDirectory() as tmp:
+            name = os.path.join(tmp, "puzzles.txt")
+            with open(name, "w") as f:
+                f.write("\n".join(lines) + "\n")
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                rc = main(["solve", *options, name])
+        return rc, out.getvalue().splitlines()
+
+    def test_solve_81(self):
+        rc, output = self.runSolve(["# comment", puzzle, "", "11" + "." * 79, "abc"])
+        self.assertEqual(rc, 1)
+        self.assertEqual(output, [solution, "bad_puzzle", "invalid"])
+
+    def test_solve_json(self):
+        rc, output = self.runSolve([puzzle, puzzle], "--format", "json", "--workers", "2")
+        self.assertEqual(rc, 0)
+        self.assertEqual(len(output), 2)
+        for line in output:
+            self.assertEqual(json.loads(line), {"puzzle": puzzle, "status": "solved", "solution": solution})
+
+    def test_time_budget(self):
+        rc, output = self.runSolve([puzzle], "--time-budget", "0")
+        self.assertEqual(output, ["timeout"])
+
+    def test_batch_size(self):
+        rc, output = self.runSolve([puzzle] * 5 + ["abc"], "--workers", "2", "--batch-size", "4")
+        self.assertEqual(rc, 1)
+        self.assertEqual(output, [solution] * 5 + ["invalid"])
+
+    def test_missing_file(self):
+        err = io.StringIO()
+        with contextlib.redirect_stderr(err), self.assertRaises(SystemExit) as cm:
+            main(["solve", "no_such_file.txt"])
+        self.assertNotEqual(cm.exception.code, 0)
+        self.assertIn("cannot read no_such_file.txt", err.getvalue())
+
+    def test_broken_pipe(self):
+        packageParent = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        env = dict(os.environ, PYTHONPATH=packageParent)
+        proc = subprocess.Popen([sys.executable, "-m", "Sudoku", "solve"], env=env, stdin=subprocess.PIPE,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        proc.stdin.write((puzzle + "\n") * 200)
+        proc.stdin.close()
+        self.assertEqual(proc.stdout.readline().strip(), solution)
+        proc.stdout.close()
+        proc.wait()
+        self.assertEqual(proc.stderr.read(), "")
+        proc.stderr.close()
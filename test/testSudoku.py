@@ -1,11 +1,17 @@
 import unittest
-from Sudoku.sudoku import sudoku, PuzzleSolved
+from Sudoku.sudoku import sudoku, PuzzleSolved, TimeBudgetExceeded, MRV, iterSolutions, InvalidPuzzle, PuzzleError, ALL_VALUES, bitIndexes
+import itertools
+import os
+import subprocess
+import sys
+import tempfile
 import Sudoku.data
+import Sudoku.benchmark
 
 class TestSudoku(unittest.TestCase):
 
-    def runTest(self, puzzle, solution):
-        su = sudoku()
+    def runTest(self, puzzle, solution, trialOrder=None):
+        su = sudoku() if trialOrder is None else sudoku(trialOrder)
         su.load(puzzle)
 
         with self.assertRaises(PuzzleSolved):
@@ -88,3 +94,207 @@ class TestSudoku(unittest.TestCase):
         ]
 
         self.runTest(puzzle, solution)
+
+    def test_hardest_puzzle_mrv(self):
+        puzzle = Sudoku.data.hardest_puzzle
+
+        solution = [
+            "697243185",
+            "453816927",
+            "812597364",
+            "926781543",
+            "341625798",
+            "785439612",
+            "134972856",
+            "269358471",
+            "578164239"
+        ]
+
+        self.runTest(puzzle, solution, MRV)
+
+    def test_bad_trial_order(self):
+        with self.assertRaises(Exception):
+            sudoku("random")
+
+    def test_load_flat(self):
+        su = sudoku()
+        su.load(Sudoku.data.puzzle1)
+        flat = su.flatValue()
+        self.assertEqual(len(flat), 81)
+
+        su2 = sudoku()
+        su2.loadFlat(flat.replace(".", "0"))
+        self.assertEqual(su2.flatValue(), flat)
+
+        with self.assertRaises(Exception):
+            su2.loadFlat(flat[:80])
+
+    def assertValidSolution(self, flat):
+        su = sudoku()
+        su.loadFlat(flat)
+        self.assertTrue(su.solved())
+        for group in su.groups():
+            for v in range(1, 10):
+                self.assertTrue(group.hasValue(v))
+
+    def test_iter_solutions_unique(self):
+        solutions = list(iterSolutions(Sudoku.data.hardest_puzzle))
+        self.assertEqual(solutions, ["697243185453816927812597364926781543341625798785439612134972856269358471578164239"])
+
+    def test_iter_solutions_multiple(self):
+        solution = "697243185453816927812597364926781543341625798785439612134972856269358471578164239"
+        solutions = list(iterSolutions("." * 20 + solution[20:]))
+        self.assertIn(solution, solutions)
+        self.assertEqual(len(solutions), len(set(solutions)))
+        for flat in solutions:
+            self.assertValidSolution(flat)
+
+    def test_iter_solutions_lazy(self):
+        solutions = list(itertools.islice(iterSolutions("." * 81), 3))
+        self.assertEqual(len(set(solutions)), 3)
+        for flat in solutions:
+            self.assertValidSolution(flat)
+
+    def test_iter_solutions_none(self):
+        self.assertEqual(list(iterSolutions("11" + "." * 79)), [])
+
+    def test_import_has_no_side_effects(self):
+        packageParent = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        env = dict(os.environ, PYTHONPATH=packageParent)
+        script = "import sys, logging, Sudoku.sudoku; print('curses' in sys.modules, len(logging.getLogger().handlers))"
+        with tempfile.TemporaryDirectory() as cwd:
+            output = subprocess.run([sys.executable, "-c", script], cwd=cwd, env=env, capture_output=True, text=True, check=True).stdout
+            self.assertEqual(output.split(), ["False", "0"])
+            self.assertEqual(os.listdir(cwd), [])
+
+    def loadErrors(self, flat, minGivens=0):
+        with self.assertRaises(InvalidPuzzle) as cm:
+            sudoku().loadFlat(flat, minGivens)
+        return [(e.reason, e.group, e.row, e.col, e.value) for e in cm.exception.errors]
+
+    def test_validate_duplicate(self):
+        errors = self.loadErrors("1" + "." * 9 + "1" + "." * 70)
+        self.assertEqual(errors, [(PuzzleError.DUPLICATE, "box 0", 1, 1, 1)])
+
+    def test_validate_no_candidates(self):
+        errors = self.loadErrors("12345678." + "." * 8 + "9" + "." * 63)
+        self.assertIn((PuzzleError.NO_CANDIDATES, None, 0, 8, None), errors)
+
+    def test_validate_no_place(self):
+        # 1 is blocked from every empty cell in row 0 without any cell running out of candidates
+        grid = [["."] * 9 for _ in range(9)]
+        grid[0][7] = "2"
+        grid[0][8] = "3"
+        grid[1][0] = "1"
+        grid[2][3] = "1"
+        grid[4][6] = "1"
+        errors = self.loadErrors("".join("".join(row) for row in grid))
+        self.assertIn((PuzzleError.NO_PLACE, "row 0", None, None, 1), errors)
+
+    def test_validate_too_few_givens(self):
+        errors = self.loadErrors("1" + "." * 80, 17)
+        self.assertEqual(errors, [(PuzzleError.TOO_FEW_GIVENS, None, None, None, None)])
+
+    def test_model_has_no_dict(self):
+        su = sudoku()
+        su.load(Sudoku.data.puzzle1)
+        for obj in (su, su.cells[0][0], su.rows[0], su.cols[0], su.boxes[0]):
+            self.assertFalse(hasattr(obj, "__dict__"))
+
+    def test_cells_are_views(self):
+        su = sudoku()
+        su.load(Sudoku.data.hardest_puzzle)
+        self.assertEqual(su.cellAt(10), su.cells[1][1])
+        self.assertEqual(len({su.cellAt(10), su.cells[1][1]}), 1)
+        self.assertNotEqual(su.cellAt(10), sudoku().cellAt(10))
+        su.initPotentials()
+        cell = next(c for c in su.board if not c.complete())
+        self.assertEqual(cell.potentialValues, list(bitIndexes(su.potentials[cell.index])))
+
+    def test_memory_per_board(self):
+        def loaded():
+            su = sudoku()
+            su.load(Sudoku.data.hardest_puzzle)
+            return su
+        size = Sudoku.benchmark.bytesPerBoard(loaded, 20)
+        self.assertGreaterEqual(Sudoku.benchmark.MEMORY_BASELINE["loaded"] / size, Sudoku.benchmark.MEMORY_TARGET_RATIO)
+
+    def test_x_wing(self):
+        su = sudoku()
+        for row in su.cells:
+            for cell in row:
+                cell.potentials = ALL_VALUES
+        # 1 can only go in columns 2 and 6 in rows 0 and 4
+        for r in (0, 4):
+            for c in range(9):
+                if c not in (2, 6):
+                    su.cells[r][c].potentials &= ~(1 << 1)
+
+        self.assertTrue(su.findFish(2, su.setCell, su.flashCellValues))
+
+        for r in range(9):
+            for c in (2, 6):
+                self.assertEqual(1 in su.cells[r][c].potentialValues, r in (0, 4))
+        self.assertIn(1, su.cells[1][0].potentialValues)
+
+    def test_strategies_keep_solution(self):
+        puzzles = [
+            (Sudoku.data.harder_puzzle, "563798412187243965249165873354871629971526348628934157895417236716382594432659781"),
+            (Sudoku.data.hardest_puzzle, "697243185453816927812597364926781543341625798785439612134972856269358471578164239"),
+        ]
+        for (puzzle, solution) in puzzles:
+            su = sudoku()
+            su.load(puzzle)
+            try:
+                su.initPotentials()
+                strategies = [
+                    lambda: su.findFish(2, su.setCell, su.flashCellValues),
+                    lambda: su.findFish(3, su.setCell, su.flashCellValues),
+                    lambda: su.findColouring(su.setCell, su.flashCellValues),
+                    lambda: su.findXYChains(su.setCell, su.flashCellValues),
+                ]
+                progress = True
+                while progress:
+                    progress = False
+                    for strategy in strategies:
+                        progress = strategy() or progress
+                        for index in range(81):
+                            cell = su.cellAt(index)
+                            expected = int(solution[index])
+                            if cell.complete():
+                                self.assertEqual(cell.value, expected)
+                            else:
+                                self.assertIn(expected, cell.potentialValues)
+            except PuzzleSolved:
+                self.assertEqual(su.flatValue(), solution)
+
+    def test_elimination_passes_not_counted(self):
+        # Needs many passes that only remove potential values. These must not use up the pass limit
+        su = sudoku()
+        su.loadFlat("...3..5.6..........794.8....8...6......92...869.5...2.1.3....694.....7...2....3..")
+        try:
+            su.solve()
+        except PuzzleSolved:
+            pass
+        self.assertTrue(su.solved())
+        self.assertEqual(su.flatValue(), "842317596316295874579468213281746935735921648694583127153872469468139752927654381")
+
+    def test_initial_singles_already_set(self):
+        # Setting one of the initially solved cells forces another that was also queued
+        su = sudoku()
+        su.loadFlat("641..2...2.....1.9.8....2..1..74.8.......9....9..8..6.3....5..7..29.7........3..8")
+
+        with self.assertRaises(PuzzleSolved):
+            su.solve()
+
+        self.assertEqual(su.flatValue(), "641592783235678149789134256123746895468259371597381462314865927852917634976423518")
+
+    def test_deadline_checked_per_trial(self):
+        su = sudoku()
+        su.load(Sudoku.data.hardest_puzzle)
+        su.initPotentials()
+        su.deadline = 0
+        cell = next(c for row in su.cells for c in row if not c.complete())
+        with self.assertRaises(TimeBudgetExceeded):
+            su.trialValue(cell, cell.potentialValues[0])
+        self.assertEqual(su.trials, 0)